@@ -1,15 +1,33 @@
 import os
+
+# Pin BLAS/OpenMP pools to one thread before numpy/sklearn import: for
+# single-row inference the thread fan-out costs more than the work itself
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+os.environ.setdefault('MKL_NUM_THREADS', '1')
+
 import json
 import base64
+import hashlib
 import io
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
 import numpy as np
+import orjson
 import pandas as pd
 import librosa
+import soundfile as sf
+from scipy.signal import resample_poly
 import joblib
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime
-from flask import Flask, request, render_template, jsonify, send_file
+from flask import Flask, request, render_template, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from reportlab.lib.pagesizes import letter
@@ -20,6 +38,12 @@ from reportlab.lib import colors
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 
+# numba is optional — without it the fused kernel falls back to plain numpy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for API access
 
@@ -28,6 +52,9 @@ UPLOAD_FOLDER = 'static/audio_uploads'
 VISUALIZATIONS_FOLDER = 'static/visualizations'
 HISTORY_FILE = 'data/emotion_history.csv'
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'm4a'}
+
+# Sample rate the model was trained at (librosa.load default in train_model.py)
+TARGET_SAMPLE_RATE = 22050
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['VISUALIZATIONS_FOLDER'] = VISUALIZATIONS_FOLDER
 
@@ -36,9 +63,38 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(VISUALIZATIONS_FOLDER, exist_ok=True)
 os.makedirs('data', exist_ok=True)
 
-# Load the trained model and scaler
+# Load the trained model (the pickle is compressed, which joblib cannot
+# memory-map, so load it normally — it is small enough that the decompress is
+# a one-off cold-start cost)
 model = joblib.load('models/emotion_model.pkl')
-scaler = joblib.load('models/scaler.pkl')
+
+MODEL_FEATURE_DIM = int(getattr(model, 'n_features_in_', 40))
+
+# Newly trained tree models ship without a scaler (trees are invariant to
+# per-feature scaling); older pickles came with one. When present, pre-compute
+# its parameters so inference applies a single fused (features - mean) *
+# inv_scale; when absent, identity constants keep the kernel a single path.
+SCALER_MEAN = np.zeros(MODEL_FEATURE_DIM, dtype=np.float32)
+SCALER_INV_SCALE = np.ones(MODEL_FEATURE_DIM, dtype=np.float32)
+if os.path.exists('models/scaler.pkl'):
+    scaler = joblib.load('models/scaler.pkl')
+    # A scaler fitted for a different feature width (e.g. one left over from
+    # an older model) would silently corrupt every prediction — only use it
+    # when it matches the loaded model
+    if scaler.mean_.shape[0] == MODEL_FEATURE_DIM:
+        SCALER_MEAN = scaler.mean_.astype(np.float32)
+        SCALER_INV_SCALE = (1.0 / scaler.scale_).astype(np.float32)
+    else:
+        print(f"Ignoring models/scaler.pkl: fitted for {scaler.mean_.shape[0]} "
+              f"features but the model expects {MODEL_FEATURE_DIM}")
+
+# Class labels as a plain tuple: indexing it and zipping against python
+# floats avoids boxing numpy scalars on every request
+MODEL_CLASSES = tuple(model.classes_.tolist())
+
+# Models trained with delta features expect 3 x 40 inputs; older pickles were
+# trained on the plain 40-dim MFCC means. Pick the reduction to match.
+USE_DELTA_FEATURES = MODEL_FEATURE_DIM == 120
 
 # Emotion mapping with emojis and colors
 EMOTION_CONFIG = {
@@ -51,68 +107,257 @@ EMOTION_CONFIG = {
     'neutral': {'emoji': '😐', 'color': '#17a2b8', 'bg_color': '#d1ecf1'}
 }
 
+# In-memory prediction cache keyed by audio content hash, so repeated uploads
+# of the same clip (common during demos/testing) skip the whole pipeline
+PREDICTION_CACHE_MAX_ENTRIES = 256
+PREDICTION_CACHE_TTL = 3600  # seconds
+prediction_cache = OrderedDict()
+prediction_cache_lock = threading.Lock()
+
+# Background pool for work that doesn't belong on the request path
+# (visualization rendering, persisting uploads)
+background_executor = ThreadPoolExecutor(max_workers=2)
+
+def audio_cache_key(audio_bytes):
+    """Content hash of the raw audio bytes, used as the prediction cache key."""
+    return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+def get_cached_prediction(cache_key):
+    """Return the cached prediction for a key, or None if missing or expired."""
+    with prediction_cache_lock:
+        entry = prediction_cache.get(cache_key)
+        if entry is None:
+            return None
+        timestamp, result = entry
+        if time.time() - timestamp > PREDICTION_CACHE_TTL:
+            del prediction_cache[cache_key]
+            return None
+        prediction_cache.move_to_end(cache_key)
+        return result
+
+def cache_prediction(cache_key, result):
+    """Store a prediction result, evicting the oldest entries when full."""
+    with prediction_cache_lock:
+        prediction_cache[cache_key] = (time.time(), result)
+        prediction_cache.move_to_end(cache_key)
+        while len(prediction_cache) > PREDICTION_CACHE_MAX_ENTRIES:
+            prediction_cache.popitem(last=False)
+
+def json_response(payload, status=200):
+    """Build a JSON response with orjson, which serializes numpy types natively
+    and is several times faster than the stdlib encoder behind jsonify."""
+    return app.response_class(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                              status=status, mimetype='application/json')
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_features(file_path):
-    """Extract MFCC features from audio file."""
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _mean_scale(mfccs, mean, inv_scale):
+        """Fused time-mean + standard scaling in one pass, no temporaries."""
+        out = np.empty(mfccs.shape[0], dtype=np.float32)
+        n_frames = mfccs.shape[1]
+        for i in range(mfccs.shape[0]):
+            s = 0.0
+            for j in range(n_frames):
+                s += mfccs[i, j]
+            out[i] = (s / n_frames - mean[i]) * inv_scale[i]
+        return out
+
+    @njit(cache=True, fastmath=True)
+    def _mean_delta_scale(mfccs, mean, inv_scale):
+        """Fused mean + delta/delta-delta means + scaling in one pass."""
+        n_coeffs, n_frames = mfccs.shape
+        out = np.empty(3 * n_coeffs, dtype=np.float32)
+        interior = max(n_frames - 2, 1)
+        for i in range(n_coeffs):
+            s = 0.0
+            for j in range(n_frames):
+                s += mfccs[i, j]
+            ds = 0.0
+            dds = 0.0
+            for j in range(1, n_frames - 1):
+                ds += (mfccs[i, j + 1] - mfccs[i, j - 1]) * 0.5
+                dds += mfccs[i, j + 1] - 2.0 * mfccs[i, j] + mfccs[i, j - 1]
+            out[i] = (s / n_frames - mean[i]) * inv_scale[i]
+            out[n_coeffs + i] = (ds / interior - mean[n_coeffs + i]) * inv_scale[n_coeffs + i]
+            out[2 * n_coeffs + i] = (dds / interior - mean[2 * n_coeffs + i]) * inv_scale[2 * n_coeffs + i]
+        return out
+else:
+    def _mean_scale(mfccs, mean, inv_scale):
+        """numpy fallback for the fused time-mean + standard scaling."""
+        return ((mfccs.mean(axis=1) - mean) * inv_scale).astype(np.float32)
+
+    def _mean_delta_scale(mfccs, mean, inv_scale):
+        """numpy fallback for the fused delta-feature reduction + scaling."""
+        feats = np.concatenate([
+            mfccs.mean(axis=1),
+            ((mfccs[:, 2:] - mfccs[:, :-2]) * 0.5).mean(axis=1),
+            (mfccs[:, 2:] - 2.0 * mfccs[:, 1:-1] + mfccs[:, :-2]).mean(axis=1),
+        ])
+        return ((feats - mean) * inv_scale).astype(np.float32)
+
+def scaled_feature_vector(mfccs):
+    """Reduce an MFCC matrix to the scaled feature vector the model expects."""
+    mfccs = np.ascontiguousarray(mfccs, dtype=np.float32)
+    if USE_DELTA_FEATURES:
+        return _mean_delta_scale(mfccs, SCALER_MEAN, SCALER_INV_SCALE)
+    return _mean_scale(mfccs, SCALER_MEAN, SCALER_INV_SCALE)
+
+def run_inference(mfccs):
+    """Reduce the MFCC matrix to scaled features and run one predict_proba call."""
+    # Fused float32 reduction + scaling straight from the MFCC matrix
+    features_scaled = scaled_feature_vector(mfccs).reshape(1, -1)
+
+    # One forward pass gives both the probabilities and the label
+    probabilities = model.predict_proba(features_scaled)[0]
+    prediction = MODEL_CLASSES[int(probabilities.argmax())]
+
+    return prediction, probabilities
+
+def save_upload_bytes(filepath, audio_bytes):
+    """Persist uploaded audio bytes to disk (runs off the request path)."""
     try:
-        # Load audio file
-        audio, sample_rate = librosa.load(file_path, res_type='kaiser_fast')
-        
-        # Extract MFCC features
+        with open(filepath, 'wb') as f:
+            f.write(audio_bytes)
+        return True
+    except Exception as e:
+        print(f"Error saving upload: {str(e)}")
+        return False
+
+def extract_features(source):
+    """Extract MFCC features from an audio file path or file-like object."""
+    try:
+        # Decode directly with soundfile (fast path, and /record always produces WAV)
+        try:
+            audio, sample_rate = sf.read(source, dtype='float32', always_2d=False)
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1)
+        except Exception:
+            # Fall back to librosa/audioread for formats soundfile can't
+            # decode (mp3/m4a). audioread only opens real paths, so in-memory
+            # uploads are spilled to a temp file first.
+            if hasattr(source, 'seek'):
+                source.seek(0)
+                with tempfile.NamedTemporaryFile(delete=False) as tmp:
+                    tmp.write(source.read())
+                    tmp_path = tmp.name
+                try:
+                    audio, sample_rate = librosa.load(tmp_path, sr=None, res_type='kaiser_fast')
+                finally:
+                    os.remove(tmp_path)
+            else:
+                audio, sample_rate = librosa.load(source, sr=None, res_type='kaiser_fast')
+
+        # Resample to the rate the model was trained at. Polyphase filtering
+        # needs far fewer FLOPs than the kaiser windowed-sinc resampler and
+        # is indistinguishable downstream of the mel filterbank.
+        if sample_rate != TARGET_SAMPLE_RATE:
+            g = gcd(int(sample_rate), TARGET_SAMPLE_RATE)
+            audio = resample_poly(audio, TARGET_SAMPLE_RATE // g, int(sample_rate) // g)
+            sample_rate = TARGET_SAMPLE_RATE
+
+        # Extract MFCC features; the time-mean happens fused with the
+        # scaling inside run_inference, so only the matrix is returned
         mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=40)
-        
-        # Take mean of MFCCs
-        mfccs_mean = np.mean(mfccs.T, axis=0)
-        
-        return mfccs_mean, audio, sample_rate
+
+        return audio, sample_rate, mfccs
     except Exception as e:
         print(f"Error extracting features: {str(e)}")
         return None, None, None
 
-def create_visualizations(audio, sample_rate, filename):
+# One reusable Figure per thread: figure + canvas construction is a large
+# fixed cost per render, and clearing is much cheaper. Plain Figure objects
+# (not pyplot) are also safe to drive from the background pool.
+_figure_tls = threading.local()
+
+def _get_figure():
+    """Return this thread's reusable Figure, cleared and ready to draw on."""
+    fig = getattr(_figure_tls, 'fig', None)
+    if fig is None:
+        fig = Figure(figsize=(12, 10))
+        _figure_tls.fig = fig
+    else:
+        fig.clear()  # drops old axes and colorbars, keeps the canvas
+    return fig
+
+def pack_array_base64(arr):
+    """Pack an array as base64-encoded float16 bytes for compact transfer."""
+    return base64.b64encode(np.asarray(arr, dtype=np.float16).tobytes()).decode('ascii')
+
+def build_plot_arrays(audio, sample_rate, mfccs):
+    """Build downsampled raw arrays so the client can draw the plots itself.
+
+    Sending float16 arrays and rendering waveform/spectrogram/MFCC with
+    Canvas on the client is far cheaper than rasterizing a PNG server-side.
+    """
+    try:
+        # ~4000 waveform points is plenty for any on-screen plot width
+        step = max(1, len(audio) // 4000)
+        waveform = audio[::step]
+
+        # Coarse spectrogram: small FFT, large hop — sized for display, not analysis
+        D = librosa.amplitude_to_db(np.abs(librosa.stft(audio, n_fft=1024, hop_length=1024)), ref=np.max)
+
+        return {
+            'encoding': 'base64/float16',
+            'sample_rate': sample_rate,
+            'waveform': {'data': pack_array_base64(waveform), 'step': step},
+            'spectrogram_db': {'data': pack_array_base64(D), 'shape': list(D.shape)},
+            'mfcc': {'data': pack_array_base64(mfccs), 'shape': list(mfccs.shape)}
+        }
+    except Exception as e:
+        print(f"Error packing plot arrays: {str(e)}")
+        return None
+
+def create_visualizations(audio, sample_rate, filename, mfccs=None):
     """Create waveform, spectrogram, and MFCC visualizations."""
     try:
-        # Create figure with subplots
-        fig, axes = plt.subplots(3, 1, figsize=(12, 10))
+        # Reuse the thread's figure instead of building a new one
+        fig = _get_figure()
+        axes = fig.subplots(3, 1)
         fig.suptitle('SentiSound - Audio Analysis', fontsize=16, fontweight='bold')
         
-        # 1. Waveform
-        axes[0].plot(np.linspace(0, len(audio)/sample_rate, len(audio)), audio)
+        # 1. Waveform (plot at most ~4000 points — the axis is ~1200 pixels wide)
+        step = max(1, len(audio) // 4000)
+        axes[0].plot(np.arange(0, len(audio), step) / sample_rate, audio[::step])
         axes[0].set_title('Waveform')
         axes[0].set_xlabel('Time (s)')
         axes[0].set_ylabel('Amplitude')
         axes[0].grid(True, alpha=0.3)
         
-        # 2. Spectrogram
-        D = librosa.amplitude_to_db(np.abs(librosa.stft(audio)), ref=np.max)
+        # 2. Spectrogram (1024-point one-sided FFT is plenty for a screen-sized plot)
+        D = librosa.amplitude_to_db(np.abs(librosa.stft(audio, n_fft=1024, hop_length=512)), ref=np.max)
         img = librosa.display.specshow(D, y_axis='linear', x_axis='time', sr=sample_rate, ax=axes[1])
         axes[1].set_title('Spectrogram')
         axes[1].set_xlabel('Time (s)')
         axes[1].set_ylabel('Frequency (Hz)')
         fig.colorbar(img, ax=axes[1], format='%+2.0f dB')
         
-        # 3. MFCC
-        mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=13)
-        img = librosa.display.specshow(mfccs, x_axis='time', sr=sample_rate, ax=axes[2])
+        # 3. MFCC (reuse the coefficients computed for the prediction when available)
+        if mfccs is None:
+            mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=13)
+        img = librosa.display.specshow(mfccs[:13, :], x_axis='time', sr=sample_rate, ax=axes[2])
         axes[2].set_title('MFCC')
         axes[2].set_xlabel('Time (s)')
         axes[2].set_ylabel('MFCC Coefficients')
         fig.colorbar(img, ax=axes[2])
         
-        plt.tight_layout()
-        
+        fig.tight_layout()
+
         # Save visualization
         viz_path = os.path.join(app.config['VISUALIZATIONS_FOLDER'], f'{filename}_analysis.png')
-        plt.savefig(viz_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
+        fig.savefig(viz_path, dpi=100, bbox_inches='tight')
+
         return f'visualizations/{filename}_analysis.png'
     except Exception as e:
         print(f"Error creating visualizations: {str(e)}")
         return None
 
+# Serializes appends to the history CSV across concurrent requests
+history_lock = threading.Lock()
+
 def save_emotion_history(filename, emotion, probabilities, confidence_threshold=0.5):
     """Save emotion prediction to history CSV."""
     try:
@@ -124,42 +369,51 @@ def save_emotion_history(filename, emotion, probabilities, confidence_threshold=
             'confidence': [max(probabilities.values())],
             'top_3_probabilities': [json.dumps(dict(sorted(probabilities.items(), key=lambda x: x[1], reverse=True)[:3]))]
         }
-        
+
         df_new = pd.DataFrame(history_data)
-        
-        # Load existing history or create new
-        if os.path.exists(HISTORY_FILE):
-            df_existing = pd.read_csv(HISTORY_FILE)
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        else:
-            df_combined = df_new
-        
-        # Save to CSV
-        df_combined.to_csv(HISTORY_FILE, index=False)
-        
+
+        # Append the new row instead of rewriting the whole file
+        with history_lock:
+            df_new.to_csv(HISTORY_FILE, mode='a',
+                          header=not os.path.exists(HISTORY_FILE), index=False)
+
         return True
     except Exception as e:
         print(f"Error saving history: {str(e)}")
         return False
 
+# Report styles are identical for every report — build them once at import
+# instead of cloning the sample stylesheet per request
+PDF_STYLES = getSampleStyleSheet()
+PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=PDF_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    alignment=1  # Center alignment
+)
+PDF_PROB_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
 def generate_pdf_report(emotion, probabilities, filename, audio_path, viz_path):
     """Generate PDF report with emotion analysis results."""
     try:
         # Create PDF buffer
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, compress=1)
+        styles = PDF_STYLES
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        story.append(Paragraph("SentiSound - Audio Emotion Analysis Report", title_style))
+        story.append(Paragraph("SentiSound - Audio Emotion Analysis Report", PDF_TITLE_STYLE))
         story.append(Spacer(1, 20))
         
         # Basic info
@@ -179,16 +433,7 @@ def generate_pdf_report(emotion, probabilities, filename, audio_path, viz_path):
             prob_data.append([emotion_name.title(), f"{prob*100:.1f}%"])
         
         prob_table = Table(prob_data, colWidths=[2*inch, 1.5*inch])
-        prob_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        prob_table.setStyle(PDF_PROB_TABLE_STYLE)
         story.append(prob_table)
         story.append(Spacer(1, 20))
         
@@ -242,6 +487,16 @@ def get_emotion_suggestions(emotion):
     }
     return suggestions.get(emotion, suggestions['neutral'])
 
+# Pre-built per-emotion response fragments: the emotion set is fixed, so the
+# suggestion and config dicts never need rebuilding per request
+RESPONSE_TEMPLATE = {
+    emotion: {
+        'suggestions': get_emotion_suggestions(emotion),
+        'emotion_config': config
+    }
+    for emotion, config in EMOTION_CONFIG.items()
+}
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -249,94 +504,212 @@ def home():
 @app.route('/predict', methods=['POST'])
 def predict():
     if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+        return json_response({'error': 'No file uploaded'}), 400
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return json_response({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Extract features
-        features, audio, sample_rate = extract_features(filepath)
-        if features is None:
-            return jsonify({'error': 'Error processing audio file'}), 400
-        
-        # Scale features
-        features_scaled = scaler.transform(features.reshape(1, -1))
-        
+        file_bytes = file.read()
+        cache_key = audio_cache_key(file_bytes)
+
+        # Serve repeated uploads of the same audio straight from the cache
+        cached = get_cached_prediction(cache_key)
+        if cached is not None:
+            prediction = cached['emotion']
+            return json_response({
+                'emotion': prediction,
+                'probabilities': cached['probabilities'],
+                'audio_file': cached['audio_file'],
+                'visualization': cached['visualization'],
+                'plot_arrays': cached.get('plot_arrays'),
+                'suggestions': RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])['suggestions'],
+                'emotion_config': RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])['emotion_config']
+            })
+
+        # Persist the upload off the request path (history/report/viz read it later)
+        background_executor.submit(save_upload_bytes, filepath, file_bytes)
+
+        # Extract features straight from memory, skipping the disk round-trip
+        audio, sample_rate, mfccs = extract_features(io.BytesIO(file_bytes))
+        if mfccs is None:
+            return json_response({'error': 'Error processing audio file'}), 400
+
         # Make prediction
-        prediction = model.predict(features_scaled)[0]
-        probabilities = model.predict_proba(features_scaled)[0]
-        
+        prediction, probabilities = run_inference(mfccs)
+
         # Get emotion probabilities
-        emotion_probs = dict(zip(model.classes_, probabilities))
-        
-        # Create visualizations
-        viz_path = create_visualizations(audio, sample_rate, filename)
-        
-        # Save to history
-        save_emotion_history(filename, prediction, emotion_probs)
-        
-        # Get suggestions
-        suggestions = get_emotion_suggestions(prediction)
-        
-        # Get emotion config
-        emotion_config = EMOTION_CONFIG.get(prediction, EMOTION_CONFIG['neutral'])
-        
-        return jsonify({
+        emotion_probs = dict(zip(MODEL_CLASSES, probabilities.tolist()))
+
+        # Render the visualization in the background; /viz/<filename> serves it
+        # (and re-renders on demand if the warm-up hasn't finished yet)
+        viz_path = f'visualizations/{filename}_analysis.png'
+        background_executor.submit(create_visualizations, audio, sample_rate, filename, mfccs)
+
+        # Raw arrays for client-side rendering (PNG stays available via /viz)
+        plot_arrays = build_plot_arrays(audio, sample_rate, mfccs)
+
+        # Save to history off the request path
+        background_executor.submit(save_emotion_history, filename, prediction, emotion_probs)
+
+        # Cache the result for repeated uploads
+        cache_prediction(cache_key, {
+            'emotion': prediction,
+            'probabilities': emotion_probs,
+            'audio_file': filename,
+            'visualization': viz_path,
+            'plot_arrays': plot_arrays
+        })
+
+        # Look up the pre-built fragments for this emotion
+        template = RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])
+        suggestions = template['suggestions']
+
+        emotion_config = template['emotion_config']
+
+        return json_response({
             'emotion': prediction,
             'probabilities': emotion_probs,
             'audio_file': filename,
             'visualization': viz_path,
+            'plot_arrays': plot_arrays,
             'suggestions': suggestions,
             'emotion_config': emotion_config
         })
-    
-    return jsonify({'error': 'Invalid file type'}), 400
+
+    return json_response({'error': 'Invalid file type'}), 400
 
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     """API endpoint for external access."""
     if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+        return json_response({'error': 'No file uploaded'}), 400
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return json_response({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Extract features
-        features, _, _ = extract_features(filepath)
-        if features is None:
-            return jsonify({'error': 'Error processing audio file'}), 400
-        
-        # Scale features
-        features_scaled = scaler.transform(features.reshape(1, -1))
-        
+        file_bytes = file.read()
+        cache_key = audio_cache_key(file_bytes)
+
+        # Serve repeated uploads of the same audio straight from the cache
+        cached = get_cached_prediction(cache_key)
+        if cached is not None:
+            emotion_probs = cached['probabilities']
+            return json_response({
+                'emotion': cached['emotion'],
+                'confidence': round(max(emotion_probs.values()), 3),
+                'probabilities': {k: round(v, 3) for k, v in emotion_probs.items()},
+                'filename': filename
+            })
+
+        # Persist the upload off the request path (history/report download read it later)
+        background_executor.submit(save_upload_bytes, filepath, file_bytes)
+
+        # Extract features straight from memory, skipping the disk round-trip
+        _, _, mfccs = extract_features(io.BytesIO(file_bytes))
+        if mfccs is None:
+            return json_response({'error': 'Error processing audio file'}), 400
+
         # Make prediction
-        prediction = model.predict(features_scaled)[0]
-        probabilities = model.predict_proba(features_scaled)[0]
-        
+        prediction, probabilities = run_inference(mfccs)
+
         # Get emotion probabilities
-        emotion_probs = dict(zip(model.classes_, probabilities))
+        emotion_probs = dict(zip(MODEL_CLASSES, probabilities.tolist()))
         confidence = max(emotion_probs.values())
-        
-        return jsonify({
+
+        # Cache the result for repeated uploads
+        cache_prediction(cache_key, {
+            'emotion': prediction,
+            'probabilities': emotion_probs,
+            'audio_file': filename,
+            'visualization': None
+        })
+
+        return json_response({
             'emotion': prediction,
             'confidence': round(confidence, 3),
             'probabilities': {k: round(v, 3) for k, v in emotion_probs.items()},
             'filename': filename
         })
     
-    return jsonify({'error': 'Invalid file type'}), 400
+    return json_response({'error': 'Invalid file type'}), 400
+
+@app.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """API endpoint for classifying several files in a single call."""
+    files = request.files.getlist('file')
+    if not files:
+        return json_response({'error': 'No files uploaded'}), 400
+
+    results = []
+    accepted = []
+    for file in files:
+        if not file or file.filename == '' or not allowed_file(file.filename):
+            results.append({'filename': file.filename if file else None,
+                            'error': 'Invalid file type'})
+            continue
+        accepted.append((len(results), secure_filename(file.filename), file.read()))
+        results.append(None)
+
+    def _file_features(item):
+        index, filename, file_bytes = item
+        _, _, mfccs = extract_features(io.BytesIO(file_bytes))
+        return index, filename, mfccs
+
+    # Extract features concurrently (librosa's C backends release the GIL),
+    # then classify every row with one predict_proba call instead of N tiny ones
+    feature_rows = []
+    row_meta = []
+    if accepted:
+        with ThreadPoolExecutor(max_workers=min(8, len(accepted))) as pool:
+            for index, filename, mfccs in pool.map(_file_features, accepted):
+                if mfccs is None:
+                    results[index] = {'filename': filename,
+                                      'error': 'Error processing audio file'}
+                else:
+                    feature_rows.append(scaled_feature_vector(mfccs))
+                    row_meta.append((index, filename))
+
+    if feature_rows:
+        batch_probs = model.predict_proba(np.stack(feature_rows))
+        for (index, filename), probabilities in zip(row_meta, batch_probs):
+            emotion_probs = dict(zip(MODEL_CLASSES, probabilities.tolist()))
+            results[index] = {
+                'filename': filename,
+                'emotion': MODEL_CLASSES[int(probabilities.argmax())],
+                'confidence': round(max(emotion_probs.values()), 3),
+                'probabilities': {k: round(v, 3) for k, v in emotion_probs.items()}
+            }
+
+    return json_response({'results': results})
+
+@app.route('/viz/<filename>')
+def get_visualization(filename):
+    """Serve the analysis image for an audio file, rendering it on first access."""
+    try:
+        filename = secure_filename(filename)
+        viz_file = os.path.join(app.config['VISUALIZATIONS_FOLDER'], f'{filename}_analysis.png')
+
+        if not os.path.exists(viz_file):
+            audio_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            if not os.path.exists(audio_path):
+                return json_response({'error': 'Audio file not found'}), 404
+
+            # Render lazily from the stored upload
+            audio, sample_rate, mfccs = extract_features(audio_path)
+            if audio is None or create_visualizations(audio, sample_rate, filename, mfccs=mfccs) is None:
+                return json_response({'error': 'Error creating visualization'}), 500
+
+        return send_file(viz_file, mimetype='image/png')
+    except Exception as e:
+        return json_response({'error': str(e)}), 500
 
 @app.route('/history')
 def get_history():
@@ -346,11 +719,19 @@ def get_history():
             df = pd.read_csv(HISTORY_FILE)
             # Convert to list of dictionaries for JSON
             history = df.to_dict('records')
-            return jsonify({'history': history})
+
+            # Aggregate server-side with vectorized pandas reductions instead of
+            # making every client loop over the records in Python
+            stats = {
+                'total': int(len(df)),
+                'emotion_distribution': df['predicted_emotion'].value_counts(normalize=True).round(3).to_dict(),
+                'average_confidence': round(float(df['confidence'].mean()), 3)
+            }
+            return json_response({'history': history, 'stats': stats})
         else:
-            return jsonify({'history': []})
+            return json_response({'history': [], 'stats': {}})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @app.route('/download-report/<filename>')
 def download_report(filename):
@@ -386,9 +767,9 @@ def download_report(filename):
                         mimetype='application/pdf'
                     )
         
-        return jsonify({'error': 'Report not found'}), 404
+        return json_response({'error': 'Report not found'}), 404
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @app.route('/record', methods=['POST'])
 def handle_recording():
@@ -399,58 +780,85 @@ def handle_recording():
         audio_data = data.get('audio')
         
         if not audio_data:
-            return jsonify({'error': 'No audio data received'}), 400
+            return json_response({'error': 'No audio data received'}), 400
         
         # Decode base64 audio
         audio_bytes = base64.b64decode(audio_data.split(',')[1])
-        
+        cache_key = audio_cache_key(audio_bytes)
+
+        # Serve repeated recordings of the same audio straight from the cache
+        cached = get_cached_prediction(cache_key)
+        if cached is not None:
+            prediction = cached['emotion']
+            return json_response({
+                'emotion': prediction,
+                'probabilities': cached['probabilities'],
+                'audio_file': cached['audio_file'],
+                'visualization': cached['visualization'],
+                'plot_arrays': cached.get('plot_arrays'),
+                'suggestions': RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])['suggestions'],
+                'emotion_config': RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])['emotion_config']
+            })
+
         # Save temporary file
         filename = f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
-        with open(filepath, 'wb') as f:
-            f.write(audio_bytes)
-        
-        # Process the recording
-        features, audio, sample_rate = extract_features(filepath)
-        if features is None:
-            return jsonify({'error': 'Error processing audio recording'}), 400
-        
-        # Scale features
-        features_scaled = scaler.transform(features.reshape(1, -1))
+        # Persist the recording off the request path
+        background_executor.submit(save_upload_bytes, filepath, audio_bytes)
+
+        # Process the recording straight from memory
+        audio, sample_rate, mfccs = extract_features(io.BytesIO(audio_bytes))
+        if mfccs is None:
+            return json_response({'error': 'Error processing audio recording'}), 400
         
         # Make prediction
-        prediction = model.predict(features_scaled)[0]
-        probabilities = model.predict_proba(features_scaled)[0]
+        prediction, probabilities = run_inference(mfccs)
         
         # Get emotion probabilities
-        emotion_probs = dict(zip(model.classes_, probabilities))
-        
-        # Create visualizations
-        viz_path = create_visualizations(audio, sample_rate, filename)
+        emotion_probs = dict(zip(MODEL_CLASSES, probabilities.tolist()))
         
-        # Save to history
-        save_emotion_history(filename, prediction, emotion_probs)
+        # Render the visualization in the background; /viz/<filename> serves it
+        # (and re-renders on demand if the warm-up hasn't finished yet)
+        viz_path = f'visualizations/{filename}_analysis.png'
+        background_executor.submit(create_visualizations, audio, sample_rate, filename, mfccs)
+
+        # Raw arrays for client-side rendering (PNG stays available via /viz)
+        plot_arrays = build_plot_arrays(audio, sample_rate, mfccs)
         
-        # Get suggestions
-        suggestions = get_emotion_suggestions(prediction)
+        # Save to history off the request path
+        background_executor.submit(save_emotion_history, filename, prediction, emotion_probs)
+
+        # Cache the result for repeated recordings
+        cache_prediction(cache_key, {
+            'emotion': prediction,
+            'probabilities': emotion_probs,
+            'audio_file': filename,
+            'visualization': viz_path,
+            'plot_arrays': plot_arrays
+        })
+
+        # Look up the pre-built fragments for this emotion
+        template = RESPONSE_TEMPLATE.get(prediction, RESPONSE_TEMPLATE['neutral'])
+        suggestions = template['suggestions']
         
-        # Get emotion config
-        emotion_config = EMOTION_CONFIG.get(prediction, EMOTION_CONFIG['neutral'])
+        emotion_config = template['emotion_config']
         
-        return jsonify({
+        return json_response({
             'emotion': prediction,
             'probabilities': emotion_probs,
             'audio_file': filename,
             'visualization': viz_path,
+            'plot_arrays': plot_arrays,
             'suggestions': suggestions,
             'emotion_config': emotion_config
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 if __name__ == '__main__':
     print("🎤 Starting SentiSound - Advanced Audio Emotion Detection System")
     print("🌐 Access the application at: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # debug=False: the reloader forks a second process and doubles model memory
+    app.run(debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -1,14 +1,62 @@
 import os
+import pickle
+import re
+from math import gcd
+from pathlib import Path
 import numpy as np
 import pandas as pd
 import librosa
+from librosa.util.exceptions import ParameterError
+import soundfile as sf
+from scipy.signal import resample_poly
 import joblib
+from joblib import Parallel, delayed
 import kagglehub
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report
 
+# numba is optional — without it the reduction falls back to plain numpy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# torchaudio is optional: when installed, feature extraction runs as batched
+# MFCC transforms (on CUDA when available) instead of per-file librosa pipelines
+try:
+    import torch
+    import torchaudio
+except ImportError:
+    torch = None
+    torchaudio = None
+
+# Sample rate features are computed at (librosa.load default)
+TARGET_SAMPLE_RATE = 22050
+MFCC_HOP_LENGTH = 512
+
+# RAVDESS clips run 3-4s; a fixed cap keeps the batched waveform stack
+# rectangular and bounds its memory regardless of outliers
+MAX_CLIP_SAMPLES = 4 * TARGET_SAMPLE_RATE
+
+# Batched extraction runs the dataset in tiles of this many files: a
+# 64 x MAX_CLIP_SAMPLES float32 stack is ~22 MB, small enough to stay
+# cache-resident through load, MFCC and mean-reduce instead of streaming
+# the whole 1440-file dataset through DRAM at once
+BATCH_TILE = 64
+
+# Extracted features are cached here so re-runs skip the decode+MFCC pipeline
+FEATURES_CACHE_FILE = 'models/features_cache.npz'
+
+# Features are assembled straight into this on-disk memmap, so dataset
+# assembly peaks at one row of memory regardless of how many files there are
+FEATURES_MEMMAP_FILE = 'models/features.dat'
+FEATURE_DIM = 120  # mean + delta + delta-delta of 40 MFCCs
+
+# RAVDESS filename prefix: modality-vocal-emotion-... ; the third field is the
+# emotion code. Compiled once, and unlike split('-') it rejects malformed names
+_FILENAME_RE = re.compile(r'^\d{2}-\d{2}-(?P<emotion>\d{2})-')
+
 def download_dataset():
     """Download RAVDESS dataset using kagglehub."""
     print("Downloading RAVDESS dataset...")
@@ -21,28 +69,147 @@ def download_dataset():
         print(f"Error downloading dataset: {str(e)}")
         return None
 
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _mfcc_delta_stats(mfccs):
+        """Mean, delta-mean and delta-delta-mean in one fused pass over frames.
+
+        Nothing of size coeffs x frames is ever materialized for the deltas;
+        the central differences are accumulated coefficient by coefficient.
+        """
+        n_coeffs, n_frames = mfccs.shape
+        out = np.empty(3 * n_coeffs, dtype=np.float32)
+        interior = max(n_frames - 2, 1)
+        for i in range(n_coeffs):
+            s = 0.0
+            for j in range(n_frames):
+                s += mfccs[i, j]
+            ds = 0.0
+            dds = 0.0
+            for j in range(1, n_frames - 1):
+                ds += (mfccs[i, j + 1] - mfccs[i, j - 1]) * 0.5
+                dds += mfccs[i, j + 1] - 2.0 * mfccs[i, j] + mfccs[i, j - 1]
+            out[i] = s / n_frames
+            out[n_coeffs + i] = ds / interior
+            out[2 * n_coeffs + i] = dds / interior
+        return out
+else:
+    def _mfcc_delta_stats(mfccs):
+        """numpy fallback for the fused mean + delta + delta-delta reduction."""
+        return np.concatenate([
+            mfccs.mean(axis=1, dtype=np.float32),
+            ((mfccs[:, 2:] - mfccs[:, :-2]) * 0.5).mean(axis=1, dtype=np.float32),
+            (mfccs[:, 2:] - 2.0 * mfccs[:, 1:-1] + mfccs[:, :-2]).mean(axis=1, dtype=np.float32),
+        ])
+
+# Per-process scratch buffer for decoding — grown on demand, never shrunk, so
+# after the first few files workers stop allocating a fresh array per decode
+_read_buffer = np.empty(0, dtype=np.float32)
+
+def _read_into_buffer(snd):
+    """Decode an open SoundFile into the scratch buffer, mixed down to mono."""
+    global _read_buffer
+    needed = snd.frames * snd.channels
+    if _read_buffer.size < needed:
+        _read_buffer = np.empty(needed, dtype=np.float32)
+    out = _read_buffer[:needed].reshape(snd.frames, snd.channels)
+    snd.read(out=out, dtype='float32')
+    if snd.channels > 1:
+        return out.mean(axis=1)
+    return out[:, 0]
+
 def extract_features(file_path):
     """Extract MFCC features from audio file."""
     try:
-        # Load audio file
-        audio, sample_rate = librosa.load(file_path, res_type='kaiser_fast')
-        
+        # Decode directly with soundfile — RAVDESS is plain PCM WAV, so this
+        # skips the audioread stack librosa.load routes through
+        try:
+            with sf.SoundFile(file_path) as snd:
+                sample_rate = snd.samplerate
+                audio = _read_into_buffer(snd)
+        except (OSError, sf.LibsndfileError, RuntimeError):
+            audio, sample_rate = librosa.load(file_path, sr=None, res_type='kaiser_fast')
+
+        # Resample to the training rate with the polyphase filter (much
+        # cheaper than the kaiser windowed-sinc resampler)
+        if sample_rate != TARGET_SAMPLE_RATE:
+            g = gcd(int(sample_rate), TARGET_SAMPLE_RATE)
+            audio = resample_poly(audio, TARGET_SAMPLE_RATE // g, int(sample_rate) // g)
+            sample_rate = TARGET_SAMPLE_RATE
+
         # Extract MFCC features
         mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=40)
-        
-        # Take mean of MFCCs
-        mfccs_mean = np.mean(mfccs.T, axis=0)
-        
-        return mfccs_mean
-    except Exception as e:
+
+        # Reduce to mean + delta-mean + delta-delta-mean (3 x n_mfcc features)
+        return _mfcc_delta_stats(np.ascontiguousarray(mfccs))
+    except (OSError, sf.LibsndfileError, RuntimeError, ValueError, ParameterError) as e:
         print(f"Error extracting features from {file_path}: {str(e)}")
         return None
 
+_mfcc_transform = None
+
+def _get_mfcc_transform(device):
+    """Build (once) the torchaudio MFCC transform matching the librosa setup."""
+    global _mfcc_transform
+    if _mfcc_transform is None:
+        # slaney scale + normalization matches librosa's defaults; torchaudio
+        # would otherwise build an htk, unnormalized filterbank and the two
+        # extraction paths (and the serving side) would disagree
+        _mfcc_transform = torchaudio.transforms.MFCC(
+            sample_rate=TARGET_SAMPLE_RATE,
+            n_mfcc=40,
+            melkwargs={'n_fft': 2048, 'hop_length': MFCC_HOP_LENGTH,
+                       'n_mels': 128, 'mel_scale': 'slaney', 'norm': 'slaney'}
+        ).to(device)
+    return _mfcc_transform
+
+def extract_features_batch(file_paths):
+    """Extract MFCC-mean features for many files with one batched transform.
+
+    Loads every waveform, pads the batch to a common length and runs a single
+    MFCC kernel over the whole stack (on CUDA when available) instead of one
+    librosa pipeline per file. Returns a list aligned with file_paths, with
+    None for files that failed to decode.
+    """
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    mfcc_transform = _get_mfcc_transform(device)
+
+    waveforms = []
+    valid_indices = []
+    for i, path in enumerate(file_paths):
+        try:
+            waveform, sample_rate = torchaudio.load(path)
+            waveform = waveform.mean(dim=0)  # mono mix
+            if sample_rate != TARGET_SAMPLE_RATE:
+                waveform = torchaudio.functional.resample(waveform, sample_rate, TARGET_SAMPLE_RATE)
+            # Truncate to the fixed clip length so every batch stacks uniformly
+            waveforms.append(waveform[:MAX_CLIP_SAMPLES])
+            valid_indices.append(i)
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Error loading {path}: {str(e)}")
+
+    results = [None] * len(file_paths)
+    if not waveforms:
+        return results
+
+    # Pad to a common length and run one kernel launch for the whole batch;
+    # the mean is taken over each file's own frames so padding doesn't bias it
+    lengths = [w.shape[0] for w in waveforms]
+    batch = torch.nn.utils.rnn.pad_sequence(waveforms, batch_first=True).to(device)
+    with torch.no_grad():
+        mfcc_batch = mfcc_transform(batch)
+    for row, (i, length) in enumerate(zip(valid_indices, lengths)):
+        n_frames = length // MFCC_HOP_LENGTH + 1
+        mfccs = mfcc_batch[row, :, :n_frames]
+        delta = (mfccs[:, 2:] - mfccs[:, :-2]) * 0.5
+        delta2 = mfccs[:, 2:] - 2.0 * mfccs[:, 1:-1] + mfccs[:, :-2]
+        results[i] = torch.cat([mfccs.mean(dim=-1), delta.mean(dim=-1),
+                                delta2.mean(dim=-1)]).cpu().numpy()
+
+    return results
+
 def prepare_dataset(data_path):
     """Prepare dataset from RAVDESS audio files."""
-    features = []
-    labels = []
-    
     # RAVDESS emotion mapping
     emotion_map = {
         '01': 'neutral',
@@ -55,24 +222,98 @@ def prepare_dataset(data_path):
         '08': 'surprised'
     }
     
-    # Walk through the data directory
-    for root, dirs, files in os.walk(data_path):
-        for file in files:
-            if file.endswith('.wav'):
-                file_path = os.path.join(root, file)
-                
-                # Extract emotion from filename (RAVDESS format)
-                emotion = emotion_map[file.split('-')[2]]
-                
-                # Extract features
-                feature = extract_features(file_path)
+    # Collect (path, emotion) pairs first so extraction can be dispatched in
+    # bulk; rglob yields matching paths directly without building per-directory
+    # name lists the way os.walk does
+    file_list = []
+    for path in Path(data_path).rglob('*.wav'):
+        match = _FILENAME_RE.match(path.name)
+        if match is None:
+            print(f"Skipping file with unexpected name: {path.name}")
+            continue
+        file_list.append((str(path), emotion_map[match['emotion']]))
+
+    # Reuse cached features when the file set hasn't changed: nothing in the
+    # pipeline depends on anything else, so same inputs means same features
+    paths = np.array([path for path, _ in file_list])
+    if os.path.exists(FEATURES_CACHE_FILE):
+        try:
+            cache = np.load(FEATURES_CACHE_FILE)
+            if np.array_equal(cache['files'], paths) and cache['X'].shape[1] == FEATURE_DIM:
+                print(f"Using cached features from {FEATURES_CACHE_FILE}")
+                return cache['X'], cache['y']
+        except Exception as e:
+            print(f"Ignoring unreadable feature cache: {str(e)}")
+
+    # Stream rows straight into a preallocated float32 memmap instead of
+    # accumulating a Python list and copying it into np.array at the end —
+    # assembly runs in constant memory no matter the dataset size
+    n_files = len(file_list)
+    os.makedirs('models', exist_ok=True)
+    X = np.memmap(FEATURES_MEMMAP_FILE, dtype=np.float32, mode='w+',
+                  shape=(n_files, FEATURE_DIM))
+    valid = np.zeros(n_files, dtype=bool)
+
+    if torchaudio is not None:
+        # Batched extraction, one tile at a time so each padded stack stays
+        # cache-sized from decode through MFCC to the mean reduction
+        row = 0
+        for start in range(0, n_files, BATCH_TILE):
+            tile = [path for path, _ in file_list[start:start + BATCH_TILE]]
+            for feature in extract_features_batch(tile):
                 if feature is not None:
-                    features.append(feature)
-                    labels.append(emotion)
-    
-    return np.array(features), np.array(labels)
+                    X[row] = feature
+                    valid[row] = True
+                row += 1
+    else:
+        # Feature extraction is embarrassingly parallel and CPU-bound — fan out
+        # across all cores, batching jobs to amortize per-task dispatch
+        # overhead; the generator hands results back as workers finish so rows
+        # land in the memmap instead of piling up in the parent
+        feature_stream = Parallel(n_jobs=-1, prefer='processes', batch_size=16,
+                                  return_as='generator')(
+            delayed(extract_features)(path) for path, _ in file_list)
+        for row, feature in enumerate(feature_stream):
+            if feature is not None:
+                X[row] = feature
+                valid[row] = True
+
+    X.flush()
+    labels = np.array([emotion for _, emotion in file_list])
+
+    # Drop rows for files that failed to decode; when none failed the memmap
+    # is handed to sklearn as-is for out-of-core friendliness
+    if valid.all():
+        y = labels
+    else:
+        X = np.ascontiguousarray(X[valid])
+        y = labels[valid]
+
+    # Cache for the next run
+    np.savez_compressed(FEATURES_CACHE_FILE, X=X, y=y, files=paths)
 
-def train_model():
+    return X, y
+
+def build_classifier(model_type='hgb'):
+    """Build the classifier to train.
+
+    'hgb' (default) is sklearn's histogram gradient booster: features are
+    binned to uint8 internally, so the saved model is far smaller and faster
+    at predict than a 100-tree forest at comparable accuracy. 'rf' keeps the
+    original RandomForest.
+    """
+    if model_type == 'rf':
+        # Capped depth/leaves plus 70% bootstrap subsampling: fully-grown
+        # trees overfit 40-dim MFCC features and balloon the pickle, while
+        # shallower trees predict faster for the same test accuracy
+        return RandomForestClassifier(n_estimators=100, max_depth=20,
+                                      min_samples_leaf=2, max_samples=0.7,
+                                      random_state=42, n_jobs=-1)
+    return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1,
+                                          max_bins=255, early_stopping=True,
+                                          random_state=42)
+
+def train_model(model_type='hgb'):
     """Train and save the emotion detection model."""
     # Download dataset if not already present
     data_path = download_dataset()
@@ -90,27 +331,31 @@ def train_model():
     # Split the dataset
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    # Scale the features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    # Train Random Forest classifier
-    print("Training Random Forest classifier...")
-    rf_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf_classifier.fit(X_train_scaled, y_train)
+    # Both classifiers here are tree-based and invariant to monotonic
+    # per-feature scaling, so the features go in raw: no StandardScaler pass
+    # over the dataset and no scaler.pkl for the server to load
+    print(f"Training {model_type} classifier...")
+    classifier = build_classifier(model_type)
+    classifier.fit(X_train, y_train)
     
     # Evaluate the model
-    y_pred = rf_classifier.predict(X_test_scaled)
+    y_pred = classifier.predict(X_test)
     print("\nModel Evaluation:")
     print(classification_report(y_test, y_pred))
     
-    # Save the model and scaler
-    print("\nSaving model and scaler...")
+    # Save the model
+    print("\nSaving model...")
     os.makedirs('models', exist_ok=True)
-    joblib.dump(rf_classifier, 'models/emotion_model.pkl')
-    joblib.dump(scaler, 'models/scaler.pkl')
-    print("Model and scaler saved successfully!")
+    # zlib level 3 cuts the pickle size several-fold at near-negligible
+    # decompress cost, and protocol 5 keeps large buffers out-of-band so
+    # loading skips a copy
+    joblib.dump(classifier, 'models/emotion_model.pkl',
+                compress=3, protocol=pickle.HIGHEST_PROTOCOL)
+    # Remove any scaler left over from when training still wrote one, so the
+    # server never pairs the new model with stale scaling parameters
+    if os.path.exists('models/scaler.pkl'):
+        os.remove('models/scaler.pkl')
+    print("Model saved successfully!")
 
 if __name__ == "__main__":
     train_model() 
\ No newline at end of file